@@ -1,35 +1,139 @@
-from PyQt6.QtGui import QIcon, QPainter, QColor, QPixmap, QPainterPath
-from PyQt6.QtCore import Qt, QSize, QRect
+from PyQt6.QtGui import (QIcon, QPainter, QColor, QPixmap, QImage, QPainterPath,
+                         QPixmapCache, QFont, QFontMetricsF, QTransform, QBrush)
+from PyQt6.QtCore import Qt, QSize, QRect, QStandardPaths
+from pathlib import Path
+from functools import lru_cache
 
+# Pre-rendered icons written by tools/bake_icon.py
+RESOURCE_DIR = Path(__file__).resolve().parent / "resources"
+
+# Icons rendered at runtime are kept in the user's cache dir between runs.
+# Bump the version whenever the drawing code changes.
+ICON_CACHE_VERSION = 2
+
+# Sizes requested by the taskbar, tray, window decorations and about box.
+# Rendering each one natively lets QIcon hand back an exact match instead
+# of rescaling a single large pixmap on every paint.
+ICON_SIZES = (16, 22, 32, 48, 64, 128)
+
+# Define colors
+BG_COLOR = QColor("#2d2d2d")
+TEXT_BRUSH = QBrush(QColor("#ffd700"))  # Gold color
+
+# Bold font resolved once through the font database and copied per size
+_RAF_FONT = None
+
+# "RAF" shaped once at REF_SIZE and scaled into each icon size
+REF_SIZE = 128
+_RAF_PATH = None
+
+# Antialiased disk coverage rasterized once at REF_SIZE
+_DISK_MASK = None
+
+# Built once on first use; QIcon is implicitly shared so handing out
+# the same instance is cheap
+@lru_cache(maxsize=1)
 def create_app_icon():
-    # Create base pixmap
-    size = 512  # Large size for better scaling
-    pixmap = QPixmap(size, size)
-    pixmap.fill(Qt.GlobalColor.transparent)
+    return (_load_icon_files(baked_icon_path)
+            or _load_icon_files(_cached_icon_path)
+            or _build_app_icon())
+
+def baked_icon_path(size):
+    return RESOURCE_DIR / f"raf_{size}.png"
+
+def _cached_icon_path(size):
+    cache_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+    if not cache_dir:
+        return None
+    return Path(cache_dir) / "raf_icon" / f"raf_v{ICON_CACHE_VERSION}_{size}.png"
+
+def _load_icon_files(path_for_size):
+    # Skip the painter entirely when every size is already on disk
+    icon = QIcon()
+    for size in ICON_SIZES:
+        path = path_for_size(size)
+        if path is None or not path.exists():
+            return None
+        icon.addFile(str(path), QSize(size, size))
+    return icon
+
+def _save_to_cache(size, pixmap):
+    path = _cached_icon_path(size)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pixmap.save(str(path), "PNG")
+    except OSError as e:
+        print(f"Error caching app icon: {str(e)}")
+
+def _build_app_icon():
+    icon = QIcon()
+    for size in ICON_SIZES:
+        key = f"raf_icon_{size}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = _render(size)
+            QPixmapCache.insert(key, pixmap)
+            _save_to_cache(size, pixmap)
+        icon.addPixmap(pixmap)
+    return icon
+
+def _get_font(size):
+    global _RAF_FONT
+    if _RAF_FONT is None:
+        _RAF_FONT = QFont("", -1, QFont.Weight.Bold)
+    font = QFont(_RAF_FONT)
+    font.setPixelSize(size // 3)
+    return font
+
+def _get_text_path():
+    global _RAF_PATH
+    if _RAF_PATH is None:
+        font = _get_font(REF_SIZE)
+        metrics = QFontMetricsF(font)
+        # Same placement drawText uses for AlignCenter
+        x = (REF_SIZE - metrics.horizontalAdvance("RAF")) / 2
+        y = (REF_SIZE - metrics.height()) / 2 + metrics.ascent()
+        _RAF_PATH = QPainterPath()
+        _RAF_PATH.addText(x, y, font, "RAF")
+    return _RAF_PATH
+
+def _get_disk_mask():
+    global _DISK_MASK
+    if _DISK_MASK is None:
+        _DISK_MASK = QImage(REF_SIZE, REF_SIZE, QImage.Format.Format_Alpha8)
+        _DISK_MASK.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(_DISK_MASK)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(Qt.GlobalColor.white)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawEllipse(0, 0, REF_SIZE, REF_SIZE)
+        painter.end()
+    return _DISK_MASK
+
+def _render(size):
+    # Paint into the raster engine's native format and convert once
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(BG_COLOR)
     
     # Create painter
-    painter = QPainter(pixmap)
-    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-    
-    # Define colors
-    bg_color = QColor("#2d2d2d")
-    text_color = QColor("#ffd700")  # Gold color
+    painter = QPainter(image)
+    # Text is filled as a path, so only geometric antialiasing is needed
+    painter.setRenderHints(QPainter.RenderHint.Antialiasing
+                           | QPainter.RenderHint.SmoothPixmapTransform, True)
+    painter.setRenderHint(QPainter.RenderHint.TextAntialiasing, False)
     
-    # Create circular background
-    painter.setBrush(bg_color)
-    painter.setPen(Qt.PenStyle.NoPen)
-    painter.drawEllipse(0, 0, size, size)
+    # Cut the solid background down to a circle with the cached disk mask
+    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_DestinationIn)
+    painter.drawImage(QRect(0, 0, size, size), _get_disk_mask())
+    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
     
     # Add RAF text
-    font = painter.font()
-    font.setPixelSize(size // 3)
-    font.setBold(True)
-    painter.setFont(font)
-    painter.setPen(text_color)
-    
-    text_rect = QRect(0, 0, size, size)
-    painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, "RAF")
+    scale = size / REF_SIZE
+    text_path = QTransform.fromScale(scale, scale).map(_get_text_path())
+    painter.fillPath(text_path, TEXT_BRUSH)
     
     painter.end()
     
-    return QIcon(pixmap) 
\ No newline at end of file
+    return QPixmap.fromImage(image)
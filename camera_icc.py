@@ -0,0 +1,114 @@
+import struct
+from functools import lru_cache
+
+import numpy as np
+
+# Linear sRGB (D65) -> XYZ, the same matrix LibRaw derives rgb_cam from
+XYZ_FROM_SRGB = np.array([
+    [0.412453, 0.357580, 0.180423],
+    [0.212671, 0.715160, 0.072169],
+    [0.019334, 0.119193, 0.950227],
+])
+# Bradford adaptation from D65 to the D50 profile connection space
+D50_FROM_D65 = np.array([
+    [1.0478112, 0.0228866, -0.0501270],
+    [0.0295424, 0.9904844, -0.0170491],
+    [-0.0092345, 0.0150436, 0.7521316],
+])
+D50_WHITE = (0.9642, 1.0, 0.8249)
+
+# Export's gamma=(2.222, 4.5) is the BT.709 curve
+TRC_POWER = 1 / 2.222
+TRC_SLOPE = 4.5
+TRC_POINTS = 1024
+
+ICC_MARKER = b"ICC_PROFILE\0"
+
+def _s15f16(values):
+    return b"".join(struct.pack(">i", int(round(v * 65536))) for v in values)
+
+def _xyz_tag(xyz):
+    return b"XYZ \0\0\0\0" + _s15f16(xyz)
+
+def _desc_tag(text):
+    ascii_text = text.encode("ascii") + b"\0"
+    return (b"desc\0\0\0\0" + struct.pack(">I", len(ascii_text)) + ascii_text
+            + struct.pack(">II", 0, 0) + struct.pack(">HB", 0, 0) + bytes(67))
+
+def _text_tag(text):
+    return b"text\0\0\0\0" + text.encode("ascii") + b"\0"
+
+def _curve_tag():
+    # Encoded value -> linear light, inverting the BT.709 curve
+    encoded = np.linspace(0.0, 1.0, TRC_POINTS)
+    # Below this the curve is the linear toe (linear light 0.018)
+    toe = TRC_SLOPE * 0.018
+    linear = np.where(encoded < toe, encoded / TRC_SLOPE,
+                      ((encoded + 0.099) / 1.099) ** (1 / TRC_POWER))
+    table = np.round(np.clip(linear, 0.0, 1.0) * 65535).astype(">u2")
+    return b"curv\0\0\0\0" + struct.pack(">I", TRC_POINTS) + table.tobytes()
+
+def _camera_to_pcs(rgb_xyz_matrix):
+    # LibRaw's own derivation of rgb_cam: camera-from-sRGB with rows
+    # normalised so white-balanced white stays white, then inverted
+    cam_xyz = np.asarray(rgb_xyz_matrix, dtype=float)[:3]
+    cam_rgb = cam_xyz @ XYZ_FROM_SRGB
+    cam_rgb /= cam_rgb.sum(axis=1, keepdims=True)
+    srgb_from_cam = np.linalg.pinv(cam_rgb)
+    return D50_FROM_D65 @ XYZ_FROM_SRGB @ srgb_from_cam
+
+def _build_profile(tags):
+    # ICC v2 display profile: 128-byte header, tag table, 4-byte aligned tags
+    table_size = 4 + 12 * len(tags)
+    offset = 128 + table_size
+    entries = []
+    body = b""
+    placed = {}
+    for signature, data in tags:
+        if data not in placed:
+            placed[data] = offset + len(body)
+            body += data + bytes(-len(data) % 4)
+        entries.append(struct.pack(">4sII", signature, placed[data], len(data)))
+    size = offset + len(body)
+    header = (struct.pack(">I", size) + bytes(4) + struct.pack(">I", 0x02100000)
+              + b"mntrRGB XYZ " + bytes(12) + b"acsp" + bytes(24)
+              + struct.pack(">I", 0) + _s15f16(D50_WHITE) + bytes(48))
+    return header + struct.pack(">I", len(tags)) + b"".join(entries) + body
+
+@lru_cache(maxsize=8)
+def _camera_profile(matrix_bytes):
+    matrix = _camera_to_pcs(np.frombuffer(matrix_bytes, dtype=float).reshape(-1, 3))
+    curve = _curve_tag()
+    return _build_profile([
+        (b"desc", _desc_tag("Camera RGB")),
+        (b"cprt", _text_tag("No copyright, use freely")),
+        (b"wtpt", _xyz_tag(D50_WHITE)),
+        (b"rXYZ", _xyz_tag(matrix[:, 0])),
+        (b"gXYZ", _xyz_tag(matrix[:, 1])),
+        (b"bXYZ", _xyz_tag(matrix[:, 2])),
+        (b"rTRC", curve),
+        (b"gTRC", curve),
+        (b"bTRC", curve),
+    ])
+
+def camera_icc_profile(rgb_xyz_matrix):
+    """ICC profile for LibRaw's camera-space output of one camera model.
+
+    Describes pixels developed with output_color=raw and the export gamma,
+    so viewers can do the colour conversion LibRaw skipped. Returns None
+    when LibRaw has no colour matrix for the camera.
+    """
+    cam_xyz = np.ascontiguousarray(rgb_xyz_matrix, dtype=float)[:3]
+    if not cam_xyz.any():
+        return None
+    # Profiles only differ per camera model, so each is built once
+    return _camera_profile(cam_xyz.tobytes())
+
+def embed_icc_profile(jpeg, icc):
+    # Inserts an APP2 ICC_PROFILE segment after SOI and any APP0 (JFIF)
+    segment = ICC_MARKER + bytes((1, 1)) + icc
+    app2 = b"\xff\xe2" + struct.pack(">H", len(segment) + 2) + segment
+    position = 2
+    if jpeg[2:4] == b"\xff\xe0":
+        position += 2 + struct.unpack(">H", jpeg[4:6])[0]
+    return jpeg[:position] + app2 + jpeg[position:]
@@ -0,0 +1,246 @@
+import io
+import os
+import struct
+
+from PIL import Image
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
+except ImportError:  # optional; Pillow encodes when it is missing
+    TurboJPEG = None
+
+# 4:2:0 at 92 is visually indistinguishable from 95/4:4:4 for culling
+# exports, and encodes faster into smaller files
+JPEG_QUALITY = 92
+
+# Orientation values (degrees or EXIF codes) to the rotation they need
+ORIENTATION_ANGLES = {
+    90: 90, 5: 90, 6: 90,
+    180: 180, 3: 180,
+    270: 270, 7: 270, 8: 270,
+}
+
+# LibRaw user_flip codes for those clockwise rotations, the direction the
+# viewer turns them; LibRaw rotates while it writes out
+LIBRAW_FLIPS = {90: 6, 180: 3, 270: 5}
+
+_turbo = None
+
+def _turbojpeg():
+    # One encoder per worker process; None when libturbojpeg can't be loaded
+    global _turbo, TurboJPEG
+    if _turbo is None and TurboJPEG is not None:
+        try:
+            _turbo = TurboJPEG()
+        except (OSError, RuntimeError) as e:
+            print(f"libjpeg-turbo unavailable, using Pillow: {str(e)}")
+            TurboJPEG = None
+    return _turbo
+
+# Fuji RAF header: magic at 0, big-endian JPEG preview offset/length at 84
+RAF_MAGIC = b"FUJIFILMCCD-RAW"
+RAF_JPEG_POINTER = struct.Struct(">II")
+RAF_JPEG_POINTER_OFFSET = 84
+
+def read_raf_embedded_jpeg(file_path):
+    # Reads the preview straight from the RAF container without libraw;
+    # returns None when the header doesn't look like a RAF we understand
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(RAF_JPEG_POINTER_OFFSET + RAF_JPEG_POINTER.size)
+            if len(header) < RAF_JPEG_POINTER_OFFSET + RAF_JPEG_POINTER.size or not header.startswith(RAF_MAGIC):
+                return None
+            offset, length = RAF_JPEG_POINTER.unpack_from(header, RAF_JPEG_POINTER_OFFSET)
+            if not offset or not length:
+                return None
+            f.seek(offset)
+            data = f.read(length)
+    except OSError:
+        return None
+    if len(data) != length or not data.startswith(b"\xff\xd8"):
+        return None
+    return data
+
+READAHEAD_CHUNK = 1 << 20
+
+def readahead_file(file_path):
+    # Gets the file into the OS page cache so the export worker's
+    # rawpy.imread doesn't wait on the disk. Where posix_fadvise exists
+    # the kernel reads ahead in the background and this returns at once
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                return
+            buffer = bytearray(READAHEAD_CHUNK)
+            while f.readinto(buffer):
+                pass
+    except OSError:
+        pass
+
+def raw_orientation(raw):
+    # Metadata first, then the raw sensor shape; None when neither tells
+    try:
+        if hasattr(raw, 'metadata') and hasattr(raw.metadata, 'orientation'):
+            return raw.metadata.orientation
+        if raw.sizes.raw_height > raw.sizes.raw_width:  # Portrait image
+            return 90
+    except Exception:
+        pass
+    return None
+
+# Camera EXIF lives in the embedded preview: Orientation in IFD0,
+# ISOSpeedRatings in the Exif IFD
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_IFD_TAG = 0x8769
+EXIF_ISO_TAG = 0x8827
+# AHD demosaicing only pays off from this ISO up; below it PPG is used,
+# which on X-Trans also means one interpolation pass instead of three
+HIGH_ISO_DEMOSAIC = 1600
+# FBDD noise reduction is skipped below this ISO
+NOISE_REDUCTION_ISO = 800
+
+def read_preview_exif(data):
+    # (orientation, iso) from the preview's EXIF; None for what's missing.
+    # Image.open only parses the header, so nothing is decoded here
+    if data is None:
+        return None, None
+    try:
+        exif = Image.open(io.BytesIO(data)).getexif()
+    except (OSError, SyntaxError, ValueError):
+        return None, None
+    orientation = exif.get(EXIF_ORIENTATION_TAG)
+    iso = exif.get_ifd(EXIF_IFD_TAG).get(EXIF_ISO_TAG)
+    if isinstance(iso, tuple):
+        iso = iso[0] if iso else None
+    return orientation, (int(iso) if iso else None)
+
+# Embedded previews smaller than this on their long side get developed instead
+EMBEDDED_JPEG_MIN_SIDE = 1920
+
+def _is_full_size_jpeg(data):
+    try:
+        return max(Image.open(io.BytesIO(data)).size) >= EMBEDDED_JPEG_MIN_SIDE
+    except Exception:
+        return False
+
+_rawpy = None
+# postprocess() settings shared by every export, and the per-ISO choices;
+# filled with rawpy's enum members once per worker process
+_BASE_PARAMS = {}
+_DEMOSAIC = {}  # high ISO? -> DemosaicAlgorithm
+_FBDD = {}  # noisy? -> FBDDNoiseReductionMode
+_CAMERA_COLOR = None
+
+def _load_rawpy():
+    # rawpy is loaded in the worker, not by the GUI at startup
+    global _rawpy, _CAMERA_COLOR
+    if _rawpy is None:
+        import rawpy
+        # Process RAW with optimal settings for Fujifilm
+        _BASE_PARAMS.update(
+            use_camera_wb=True,    # Use camera white balance
+            use_auto_wb=False,     # Don't use auto white balance
+            bright=1.2,            # Slightly increase brightness
+            no_auto_bright=True,   # Disable auto brightness to keep exposure control
+            output_bps=8,          # Use 8-bit output for JPEG compatibility
+            gamma=(2.222, 4.5),    # Standard gamma curve for Fujifilm
+            output_color=rawpy.ColorSpace.sRGB,  # Use sRGB color space
+            highlight_mode=rawpy.HighlightMode.Blend,  # Better highlight handling
+        )
+        _DEMOSAIC.update({True: rawpy.DemosaicAlgorithm.AHD, False: rawpy.DemosaicAlgorithm.PPG})
+        _FBDD.update({True: rawpy.FBDDNoiseReductionMode.Full, False: rawpy.FBDDNoiseReductionMode.Off})
+        _CAMERA_COLOR = rawpy.ColorSpace.raw
+        _rawpy = rawpy
+    return _rawpy
+
+def export_raf(raf_file, export_path, half_size=False, quality=JPEG_QUALITY, embedded=False,
+               camera_color=False):
+    """Develop one RAF into a JPEG for export_path.
+
+    Returns (output_file, jpeg_bytes) and leaves writing to the caller, so
+    the worker can start on the next file while the disk catches up.
+    Runs in a worker process and every call opens its own file. half_size
+    builds each pixel from one 2x2 Bayer cell instead of demosaicing.
+    embedded copies the camera's full-size JPEG preview byte for byte
+    when there is one, and develops the RAF otherwise. camera_color skips
+    LibRaw's conversion to sRGB and embeds a camera ICC profile instead.
+    """
+    output_file = export_path / f"{raf_file.stem}.jpg"
+    
+    # The preview's EXIF gives orientation and ISO without LibRaw
+    data = read_raf_embedded_jpeg(raf_file)
+    orientation, iso = read_preview_exif(data)
+    
+    if embedded and data is not None and _is_full_size_jpeg(data):
+        return output_file, data
+    
+    rawpy = _load_rawpy()
+    
+    with rawpy.imread(str(raf_file)) as raw:
+        if embedded and data is None:
+            # The header didn't point at a preview; ask LibRaw for it
+            try:
+                thumb = raw.extract_thumb()
+            except rawpy.LibRawError:
+                thumb = None
+            if (thumb is not None and thumb.format == rawpy.ThumbFormat.JPEG
+                    and _is_full_size_jpeg(thumb.data)):
+                return output_file, thumb.data
+        
+        if orientation is None:
+            orientation = raw_orientation(raw) or 0
+        
+        params = dict(_BASE_PARAMS)
+        params['user_flip'] = LIBRAW_FLIPS.get(ORIENTATION_ANGLES.get(orientation), 0)
+        if half_size:
+            # No interpolation happens, so demosaic and FBDD settings don't apply
+            params['half_size'] = True
+        else:
+            # Clean low-ISO frames don't need AHD's cost or FBDD's extra passes;
+            # an unknown ISO keeps the high-quality settings
+            params['demosaic_algorithm'] = _DEMOSAIC[iso is None or iso >= HIGH_ISO_DEMOSAIC]
+            params['fbdd_noise_reduction'] = _FBDD[iso is None or iso >= NOISE_REDUCTION_ISO]
+        
+        icc = None
+        if camera_color:
+            # camera_icc needs numpy, which the GUI shouldn't load at startup
+            from camera_icc import camera_icc_profile
+            icc = camera_icc_profile(raw.rgb_xyz_matrix)
+        if icc is not None:
+            params['output_color'] = _CAMERA_COLOR
+        rgb = raw.postprocess(**params)
+    
+    turbo = _turbojpeg()
+    if turbo is not None:
+        # Encode the ndarray directly; libjpeg-turbo's SIMD encoder doesn't
+        # need Pillow's extra Huffman optimization pass
+        data = turbo.encode(rgb, quality=quality, pixel_format=TJPF_RGB,
+                            jpeg_subsample=TJSAMP_420)
+        if icc is not None:
+            from camera_icc import embed_icc_profile
+            data = embed_icc_profile(data, icc)
+        return output_file, data
+    
+    # Save as JPEG: 4:2:0 chroma, no second Huffman optimization pass
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, "JPEG", quality=quality, subsampling=2,
+                              optimize=False, progressive=False, icc_profile=icc)
+    return output_file, buffer.getvalue()
+
+def export_batch(jobs, export_path, options):
+    """Export several RAFs in one worker task.
+
+    jobs holds (index, raf_file) tuples; options are extra
+    export_raf keyword arguments. Returns one (index, output_file,
+    jpeg_bytes, error) tuple per job, catching errors per file so one bad
+    RAF doesn't lose the rest of its batch.
+    """
+    results = []
+    for idx, raf_file in jobs:
+        try:
+            output_file, data = export_raf(raf_file, export_path, **options)
+            results.append((idx, output_file, data, ""))
+        except Exception as e:
+            results.append((idx, None, None, str(e)))
+    return results
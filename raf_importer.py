@@ -1,135 +1,586 @@
 import sys
 import os
 from pathlib import Path
-import rawpy
-from PIL import Image
 import threading
-from queue import Queue
-from concurrent.futures import ThreadPoolExecutor
-import weakref
-import io
+import queue
+from collections import OrderedDict
+from bisect import bisect_left, insort
+from functools import partial
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor
 import time
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QLabel, QPushButton, QFileDialog,
                            QScrollArea, QComboBox, QGridLayout, QProgressBar,
-                           QStackedWidget, QSizePolicy)
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QThread, QObject
+                           QStackedWidget, QSizePolicy, QCheckBox, QSpinBox)
+from PyQt6.QtCore import Qt, QSize, QRect, pyqtSignal, QThread, QObject, QTimer
 from PyQt6.QtGui import QPixmap, QImage, QKeyEvent, QTransform
 
 from app_icon import create_app_icon
+from thumbnail_decode import decode_thumbnail
+from raf_export import (JPEG_QUALITY, ORIENTATION_ANGLES, export_batch, raw_orientation, read_raf_embedded_jpeg,
+                        read_preview_exif,
+                        readahead_file)
+from thumbnail_store import ThumbnailStore, default_store_path
+
+# Smallest size the embedded preview is decoded at for the grid
+THUMBNAIL_DECODE_SIZE = 320
+# Grid cells show the preview at this size; the loader caches it pre-scaled
+THUMBNAIL_SIZE = 280
+# JPEG decoding is CPU-bound, so it runs in a few processes while the
+# thread pool keeps the RAF reads in flight
+DECODE_PROCESSES = max(1, min(4, os.cpu_count() or 1))
+
+# Only three rotations are ever applied, so build their transforms once
+ROTATION_TRANSFORMS = {angle: QTransform().rotate(angle) for angle in (90, 180, 270)}
+
+def infer_orientation(raw, image=None):
+    # Prefer metadata, then the raw sensor shape, then the decoded preview
+    orientation = raw_orientation(raw)
+    if orientation is not None:
+        return orientation
+    if image is not None and image.height() > image.width():  # Portrait image
+        return 90
+    return 0
+
+def apply_orientation(image, orientation):
+    # Works for both QImage and QPixmap
+    angle = ORIENTATION_ANGLES.get(orientation)
+    if angle is None:
+        return image
+    return image.transformed(ROTATION_TRANSFORMS[angle], Qt.TransformationMode.FastTransformation)
+
+# Thumbnail extraction is mostly file I/O, so run well past the core count
+# to keep reads in flight while other workers decode
+THUMBNAIL_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+# Decoded thumbnails kept in memory; older entries are evicted first
+THUMBNAIL_CACHE_ENTRIES = 256
+# Full-size previews for the single image view are much larger
+FULL_IMAGE_CACHE_ENTRIES = 8
+# Neighbours decoded ahead of ←/→ navigation in the single image view
+PREFETCH_DEPTH = 2
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        # Looks without counting toward the hit rate or refreshing recency
+        with self._lock:
+            return self._data.get(key, default)
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# Demosaic and JPEG encode are CPU-bound, so exports run in processes;
+# each holds a full demosaiced frame, so keep the pool small
+EXPORT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# RAFs read into the page cache ahead of the busy export workers
+EXPORT_READAHEAD = 2
+# Exported JPEGs are fsynced together in batches of this many
+EXPORT_FSYNC_BATCH = 8
+# Export progress reaches the GUI at most this often (seconds)
+EXPORT_PROGRESS_INTERVAL = 0.1
+# Most RAFs one worker task exports; batches amortize the per-task IPC
+# while each finished JPEG waits in memory for the rest of its batch
+EXPORT_BATCH_MAX = 4
+
+_rawpy = None
+
+def _raw():
+    # libraw is loaded on first use so the window opens without paying for it
+    global _rawpy
+    if _rawpy is None:
+        import rawpy
+        _rawpy = rawpy
+    return _rawpy
+
+def load_full_image(file_path):
+    # Runs on a worker thread, so it returns a QImage; QPixmap is GUI-thread only.
+    rawpy = _raw()
+    with rawpy.imread(file_path) as raw:
+        thumb = raw.extract_thumb()
+        if thumb.format != rawpy.ThumbFormat.JPEG:
+            return None, 0
+        qimage = QImage.fromData(thumb.data)
+        # The preview is stored landscape; only its EXIF says how to turn it
+        orientation, _ = read_preview_exif(thumb.data)
+        if orientation is None:
+            orientation = infer_orientation(raw, qimage)
+        return apply_orientation(qimage, orientation), orientation
+
+def format_timestamp(timestamp):
+    if timestamp is None:
+        return "Date unknown"
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+def scan_raf_files(folder):
+    # One directory pass yields both the RAF list and their mtimes
+    mtimes = {}
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name.upper().endswith('.RAF') and entry.is_file():
+                mtimes[str(Path(entry.path))] = entry.stat().st_mtime
+    return sorted(Path(path) for path in mtimes), mtimes
 
 class ThumbnailLoader(QObject):
     thumbnail_ready = pyqtSignal(int, QPixmap, str, int)
+    full_image_ready = pyqtSignal(str, QImage, int)  # (file_path, rotated preview, orientation)
+    full_image_failed = pyqtSignal(str, str)  # (file_path, error)
     batch_complete = pyqtSignal()
     progress_updated = pyqtSignal(int)
+    # Worker results hop to the GUI thread here: QPixmap may only be
+    # created there. (batch, index, image or null QImage, file_path, orientation)
+    _thumbnail_decoded = pyqtSignal(object, int, QImage, str, int)
 
-    def __init__(self):
+    def __init__(self, store=None):
         super().__init__()
+        self._thumbnail_decoded.connect(self._on_thumbnail_decoded)
+        self._store = store  # optional ThumbnailStore persisted across runs
         self._stop_event = threading.Event()
-        self._queue = Queue()
-        self._cache = {}
-        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._cache = LRUCache(THUMBNAIL_CACHE_ENTRIES)
+        self._full_cache = LRUCache(FULL_IMAGE_CACHE_ENTRIES)
+        self._full_pending = {}  # file_path -> Future for request_full
+        self._executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+        self._decode_pool = self._new_decode_pool()
+        # Guards the per-batch bookkeeping below; re-entrant because
+        # cancelling a future runs its done-callback in the same thread
+        self._lock = threading.RLock()
+        self._batch = None
+        self._files = []
+        self._pending = {}  # index -> Future still queued or running
+        self._done = set()
+        self._reported = False  # batch_complete sent since pending last drained
         
     def stop(self):
         self._stop_event.set()
+        self.cancel_pending()
+        with self._lock:
+            self._decode_pool.shutdown(wait=False)
+    
+    def _new_decode_pool(self):
+        # spawn, not fork: the GUI process already runs Qt and pool threads.
+        # Spawned workers still re-import this script as their main module,
+        # so each pays for the PyQt6 import once when it starts
+        return ProcessPoolExecutor(max_workers=DECODE_PROCESSES,
+                                   mp_context=multiprocessing.get_context("spawn"))
+    
+    def _replace_decode_pool(self, broken):
+        # A worker that died takes the whole pool with it; every thread that
+        # saw it break ends up here, and only the first swaps in a new pool
+        with self._lock:
+            if self._decode_pool is broken and not self._stop_event.is_set():
+                self._decode_pool = self._new_decode_pool()
+        broken.shutdown(wait=False)
         
     def clear_cache(self):
         self._cache.clear()
+        self._full_cache.clear()
+    
+    def cache_stats(self):
+        return len(self._cache), self._cache.hits, self._cache.misses
         
     def load_thumbnails(self, files):
+        # Nothing is decoded up front; the grid requests the indices it shows
         self._stop_event.clear()
-        self._queue = Queue()
-        
-        for i, file in enumerate(files):
-            self._queue.put((i, str(file)))
+        self.cancel_pending()
+        with self._lock:
+            # Results from an earlier batch must not land in the new grid
+            self._batch = object()
+            self._files = [str(f) for f in files]
+            self._pending = {}
+            self._done = set()
+            self._reported = False
         
-        thread = threading.Thread(target=self._process_queue)
-        thread.daemon = True
-        thread.start()
-        
-    def _process_queue(self):
-        total_files = self._queue.qsize()
-        processed = 0
+        if not files:
+            self.batch_complete.emit()
+    
+    def request(self, indices):
+        if self._stop_event.is_set():
+            return
+        # Queue every miss before serving any cache hit, so completion isn't
+        # reported while later indices are still waiting to be queued
+        hits = []
+        submitted = []
+        with self._lock:
+            batch = self._batch
+            for idx in indices:
+                if not 0 <= idx < len(self._files) or idx in self._pending or idx in self._done:
+                    continue
+                file_path = self._files[idx]
+                cached = self._cache.get(file_path)
+                if cached is not None:
+                    hits.append((idx, file_path, cached))
+                    continue
+                # Submit to thread pool for RAF processing
+                future = self._executor.submit(self._load_thumbnail, idx, file_path)
+                self._pending[idx] = future
+                submitted.append((idx, future))
+            # A batch that starts with nothing to load still reports once
+            idle = not hits and not self._pending and not self._reported
+            if idle:
+                self._reported = True
         
-        while not self._queue.empty() and not self._stop_event.is_set():
-            idx, file_path = self._queue.get()
-            
-            # Check cache first
-            if file_path in self._cache:
-                pixmap, orientation = self._cache[file_path]
-                self.thumbnail_ready.emit(idx, pixmap, file_path, orientation)
-                processed += 1
-                self.progress_updated.emit(int(processed * 100 / total_files))
-                continue
-            
-            # Submit to thread pool for RAF processing
-            future = self._executor.submit(self._load_thumbnail, idx, file_path)
-            future.add_done_callback(self._handle_thumbnail_result)
-            
-            processed += 1
-            self.progress_updated.emit(int(processed * 100 / total_files))
-            
-        self.batch_complete.emit()
+        if idle:
+            self.batch_complete.emit()
+        for idx, future in submitted:
+            future.add_done_callback(partial(self._handle_thumbnail_result, batch, idx))
+        for idx, file_path, (pixmap, orientation) in hits:
+            self.thumbnail_ready.emit(idx, pixmap, file_path, orientation)
+        if hits:
+            self._mark_done(batch, *[idx for idx, file_path, cached in hits])
     
-    def _load_thumbnail(self, idx, file_path):
+    def cancel_pending(self, keep=()):
+        # Drop queued jobs for thumbnails that scrolled out of view
+        with self._lock:
+            for idx, future in list(self._pending.items()):
+                if idx not in keep and future.cancel():
+                    del self._pending[idx]
+    
+    def get_thumbnail(self, file_path):
+        # (pixmap, orientation) if cached; doesn't count toward cache_stats()
+        return self._cache.peek(file_path)
+    
+    def get_full(self, file_path):
+        return self._full_cache.get(file_path)
+    
+    def store_full(self, file_path, pixmap):
+        # Called on the GUI thread once the decoded QImage became a QPixmap
+        self._full_cache.put(file_path, pixmap)
+    
+    def request_full(self, file_path):
+        # Full-size preview for the single image view, decoded off the GUI thread
+        with self._lock:
+            future = self._full_pending.get(file_path)
+            if future is None:
+                future = self._executor.submit(load_full_image, file_path)
+                self._full_pending[file_path] = future
+            else:
+                return future
+        future.add_done_callback(partial(self._handle_full_result, file_path))
+        return future
+    
+    def _handle_full_result(self, file_path, future):
+        with self._lock:
+            self._full_pending.pop(file_path, None)
+        if future.cancelled():
+            return
         try:
-            with rawpy.imread(file_path) as raw:
-                # Try to get the embedded JPEG preview first
-                try:
+            qimage, orientation = future.result()
+            if qimage is not None:
+                self.full_image_ready.emit(file_path, qimage, orientation)
+        except Exception as e:
+            self.full_image_failed.emit(file_path, str(e))
+    
+    def _mark_done(self, batch, *indices):
+        with self._lock:
+            if batch is not self._batch:
+                return
+            for idx in indices:
+                self._pending.pop(idx, None)
+                self._done.add(idx)
+            done = len(self._done)
+            total = done + len(self._pending)
+            finished = not self._pending
+            self._reported = finished
+        self.progress_updated.emit(int(done * 100 / total))
+        if finished:
+            if self._store is not None:
+                self._store.commit()
+            self.batch_complete.emit()
+    
+    def _load_thumbnail(self, idx, file_path):
+        if self._stop_event.is_set():
+            return idx, None, file_path, 0
+        
+        # Thumbnails from an earlier run are valid while mtime and size match
+        stat = None
+        if self._store is not None:
+            try:
+                stat = os.stat(file_path)
+                stored = self._store.get_thumbnail(file_path, stat.st_mtime, stat.st_size)
+            except OSError:
+                stored = None
+            if stored is not None:
+                orientation, png = stored
+                qimage = QImage.fromData(png, "PNG")
+                if not qimage.isNull():
+                    return idx, qimage, file_path, orientation
+        
+        # Fast path: pull the preview out of the RAF header
+        data = read_raf_embedded_jpeg(file_path)
+        if data is None:
+            try:
+                rawpy = _raw()
+                with rawpy.imread(file_path) as raw:
+                    # Try to get the embedded JPEG preview first
                     thumb = raw.extract_thumb()
-                    if thumb.format == rawpy.ThumbFormat.JPEG:
-                        image_data = thumb.data
-                        qimage = QImage.fromData(image_data)
-                        
-                        # Get orientation from metadata
-                        orientation = 0
-                        try:
-                            if hasattr(raw, 'metadata') and hasattr(raw.metadata, 'orientation'):
-                                orientation = raw.metadata.orientation
-                            else:
-                                # Fallback to checking raw sizes
-                                raw_height = raw.sizes.raw_height
-                                raw_width = raw.sizes.raw_width
-                                if raw_height > raw_width:  # Portrait image
-                                    orientation = 90
-                        except:
-                            # If metadata fails, check image dimensions
-                            if qimage.height() > qimage.width():  # Portrait image
-                                orientation = 90
-                        
-                        # Apply rotation based on orientation
-                        if orientation == 90 or orientation == 5:
-                            transform = QTransform()
-                            qimage = qimage.transformed(transform.rotate(90))
-                        elif orientation == 270 or orientation == 7:
-                            transform = QTransform()
-                            qimage = qimage.transformed(transform.rotate(270))
-                        elif orientation == 180 or orientation == 3:
-                            transform = QTransform()
-                            qimage = qimage.transformed(transform.rotate(180))
-                        
-                        return idx, qimage, file_path, orientation
-                except Exception as e:
-                    print(f"Error extracting thumbnail: {str(e)}")
-                    pass
-                
+                    if thumb.format != rawpy.ThumbFormat.JPEG:
+                        return idx, None, file_path, 0
+                    data = thumb.data
+            except Exception as e:
+                print(f"Error loading RAF file: {str(e)}")
                 return idx, None, file_path, 0
-                
+        
+        pool = self._decode_pool
+        try:
+            # The preview is stored landscape, so its EXIF is what says how
+            # to turn it; without one the decoder guesses from its shape
+            exif_orientation, _ = read_preview_exif(data)
+            angle = ORIENTATION_ANGLES.get(exif_orientation, 0) if exif_orientation is not None else None
+            width, height, rgb, orientation, png = pool.submit(
+                decode_thumbnail, data, THUMBNAIL_DECODE_SIZE, THUMBNAIL_SIZE, angle,
+                stat is not None).result()
+            qimage = QImage(rgb, width, height, width * 3, QImage.Format.Format_RGB888).copy()
+        except BrokenExecutor as e:
+            # This thumbnail is lost, but later ones get a working pool
+            print(f"Thumbnail decoder died: {str(e)}")
+            self._replace_decode_pool(pool)
+            return idx, None, file_path, 0
         except Exception as e:
-            print(f"Error loading RAF file: {str(e)}")
-            
-        return idx, None, file_path, 0
+            print(f"Error extracting thumbnail: {str(e)}")
+            return idx, None, file_path, 0
+        
+        if stat is not None:
+            self._store.put_thumbnail(file_path, stat.st_mtime, stat.st_size, orientation, png)
+        return idx, qimage, file_path, orientation
     
-    def _handle_thumbnail_result(self, future):
+    def _handle_thumbnail_result(self, batch, idx, future):
+        if future.cancelled():
+            return
         try:
             idx, qimage, file_path, orientation = future.result()
-            if qimage:
-                pixmap = QPixmap.fromImage(qimage)
-                self._cache[file_path] = (pixmap, orientation)
-                self.thumbnail_ready.emit(idx, pixmap, file_path, orientation)
         except Exception as e:
             print(f"Error handling thumbnail result: {str(e)}")
+            qimage, file_path, orientation = None, "", 0
+        if qimage is None:
+            qimage = QImage()
+        self._thumbnail_decoded.emit(batch, idx, qimage, file_path, orientation)
+    
+    def _on_thumbnail_decoded(self, batch, idx, qimage, file_path, orientation):
+        # The image is already thumbnail-sized, so this conversion is cheap
+        if not qimage.isNull():
+            pixmap = QPixmap.fromImage(qimage)
+            self._cache.put(file_path, (pixmap, orientation))
+            if batch is self._batch:
+                self.thumbnail_ready.emit(idx, pixmap, file_path, orientation)
+        self._mark_done(batch, idx)
+
+class ExportWorker(QObject):
+    """Feeds RAF exports to a process pool from its own QThread.
+
+    Each RAF is read into the page cache just before it is submitted, so
+    disk reads overlap the workers' demosaicing, and the encoded JPEGs are
+    written by a separate writer thread. Progress and the final count come
+    back as signals; nothing here touches widgets.
+    """
+    progress = pyqtSignal(int, str)  # (percent, status message)
+    finished = pyqtSignal(int)  # files exported successfully
+
+    def __init__(self, executor, files, export_path, options=None):
+        super().__init__()
+        self._executor = executor
+        self._files = files
+        self._export_path = export_path
+        self._options = options or {}  # extra export_raf keyword arguments
+        self._stop = threading.Event()
+        self._futures = []
+        # Set once a worker process died; the owner replaces the executor
+        self.pool_broken = False
+        # (index, output_file, jpeg bytes or None, error, ends batch) for
+        # the writer; the slots below bound how many can be waiting
+        self._write_queue = queue.Queue()
+        # Each slot is a batch read ahead, in a worker or waiting to be
+        # written, which caps the memory the pipeline holds on to
+        self._slots = threading.Semaphore(EXPORT_WORKERS + EXPORT_READAHEAD)
+
+    def run(self):
+        threading.Thread(target=self._write_loop, daemon=True).start()
+        total = len(self._files)
+        batch_size = max(1, min(EXPORT_BATCH_MAX, total // (4 * EXPORT_WORKERS)))
+        for start in range(0, total, batch_size):
+            while not self._slots.acquire(timeout=0.1):
+                if self._stop.is_set():
+                    return
+            if self._stop.is_set():
+                return
+            jobs = []
+            for idx in range(start, min(start + batch_size, total)):
+                raf_file = self._files[idx]
+                readahead_file(raf_file)
+                jobs.append((idx, raf_file))
+            try:
+                future = self._executor.submit(export_batch, jobs, self._export_path, self._options)
+            except RuntimeError as e:
+                if self._stop.is_set():  # pool shut down while closing
+                    return
+                # A dead worker broke the pool: fail what's left so the
+                # writer still reaches the end and finished fires
+                if isinstance(e, BrokenExecutor):
+                    self.pool_broken = True
+                remaining = range(start, total)
+                for idx in remaining:
+                    self._write_queue.put((idx, None, None, str(e) or type(e).__name__,
+                                           idx == remaining[-1]))
+                return
+            future.add_done_callback(partial(self._handle_result, jobs))
+            self._futures.append(future)
+
+    def stop(self):
+        self._stop.set()
+        for future in self._futures:
+            future.cancel()
+        self._write_queue.put(None)
+
+    def _handle_result(self, jobs, future):
+        # Runs on the pool's result thread; the writer reports every outcome
+        if future.cancelled():
+            self._slots.release()
+            return
+        try:
+            results = future.result()
+        except Exception as e:  # the worker itself died, e.g. BrokenProcessPool
+            if isinstance(e, BrokenExecutor):
+                self.pool_broken = True
+            results = [(idx, None, None, str(e)) for idx, raf_file, orientation in jobs]
+        for i, result in enumerate(results):
+            self._write_queue.put(result + (i == len(results) - 1,))
+
+    def _write_loop(self):
+        # Files stay open until a batch of them is fsynced together, so the
+        # export is on disk when finished fires without a sync per file
+        total = len(self._files)
+        done = exported = 0
+        last_percent, last_report = -1, 0.0
+        unsynced = []
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            idx, output_file, data, error, ends_batch = item
+            raf_file = self._files[idx]
+            if not error:
+                try:
+                    f = open(output_file, 'wb')
+                    unsynced.append(f)
+                    f.write(data)
+                    f.flush()
+                except OSError as e:
+                    error = str(e)
+            if ends_batch:
+                self._slots.release()
+            
+            done += 1
+            if error:
+                print(f"Error exporting {raf_file}: {error}")
+                message = f"Error exporting {raf_file.name}: {error}"
+            else:
+                exported += 1
+                message = f"Exported {exported}/{total} images..."
+            
+            if len(unsynced) >= EXPORT_FSYNC_BATCH or done == total:
+                self._sync(unsynced)
+            
+            # Errors always show; otherwise skip updates that wouldn't move
+            # the bar or that come faster than the GUI needs to repaint
+            percent = done * 100 // total
+            now = time.monotonic()
+            if error or (percent != last_percent and now - last_report >= EXPORT_PROGRESS_INTERVAL):
+                self.progress.emit(percent, message)
+                last_percent, last_report = percent, now
+            if done == total:
+                self.finished.emit(exported)
+                break
+        self._sync(unsynced)
+
+    def _sync(self, files):
+        for f in files:
+            try:
+                os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Error syncing {f.name}: {str(e)}")
+            f.close()
+        files.clear()
+
+# Installed once on the QApplication; ThumbnailWidget only sets object names,
+# so Qt parses these rules once instead of once per widget
+APP_STYLESHEET = """
+    QWidget#thumbImage {
+        background-color: #2d2d2d;
+        border-radius: 5px;
+    }
+    QWidget#thumbInfo {
+        background-color: #2d2d2d;
+        border-radius: 5px;
+        color: white;
+    }
+    QLabel#filename {
+        font-weight: bold;
+        color: white;
+    }
+    QLabel#datetime {
+        color: #b0b0b0;
+    }
+    QLabel#scoreDisplay {
+        color: #ffd700;
+        font-weight: bold;
+        font-size: 14px;
+        padding: 2px;
+    }
+    QLabel#scoreBadge {
+        background-color: #ffd700;
+        color: black;
+        padding: 4px 8px;
+        border-radius: 4px;
+        font-weight: bold;
+        font-size: 14px;
+    }
+    QPushButton#score {
+        padding: 4px;
+        background-color: #3d3d3d;
+        color: #b0b0b0;
+        border: none;
+        border-radius: 3px;
+        font-size: 13px;
+    }
+    QPushButton#score:hover {
+        background-color: #4d4d4d;
+        color: #ffd700;
+    }
+    QPushButton#score:checked {
+        background-color: #ffd700;
+        color: black;
+        font-weight: bold;
+    }
+"""
 
 class ThumbnailWidget(QWidget):
     clicked = pyqtSignal(int)
@@ -140,6 +591,8 @@ class ThumbnailWidget(QWidget):
         self.index = index
         self.score = 0
         self.score_buttons = []  # Store references to score buttons
+        self.score_label = None
+        self._pixmap_key = None  # cacheKey() of the pixmap currently shown
         self.initUI()
         
     def initUI(self):
@@ -154,50 +607,38 @@ class ThumbnailWidget(QWidget):
         
         # Image container with dark background
         image_container = QWidget()
-        image_container.setStyleSheet("background-color: #2d2d2d; border-radius: 5px;")
+        image_container.setObjectName("thumbImage")
         image_container_layout = QVBoxLayout(image_container)
         image_container_layout.setContentsMargins(10, 10, 10, 10)
         
         # Image label
         self.image_label = QLabel()
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setMinimumSize(280, 280)
-        self.image_label.setStyleSheet("background-color: transparent;")
+        self.image_label.setMinimumSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
         image_container_layout.addWidget(self.image_label)
         
         layout.addWidget(image_container)
         
         # Info layout with dark background
         info_container = QWidget()
-        info_container.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                border-radius: 5px;
-                color: white;
-            }
-        """)
+        info_container.setObjectName("thumbInfo")
         info_layout = QVBoxLayout(info_container)
         info_layout.setSpacing(4)
         info_layout.setContentsMargins(10, 8, 10, 8)
         
         # Filename label
         self.filename_label = QLabel()
-        self.filename_label.setStyleSheet("font-weight: bold; color: white;")
+        self.filename_label.setObjectName("filename")
         info_layout.addWidget(self.filename_label)
         
         # DateTime label
         self.datetime_label = QLabel()
-        self.datetime_label.setStyleSheet("color: #b0b0b0;")
+        self.datetime_label.setObjectName("datetime")
         info_layout.addWidget(self.datetime_label)
         
         # Score display
         self.score_display = QLabel("Score: 0★")
-        self.score_display.setStyleSheet("""
-            color: #ffd700;
-            font-weight: bold;
-            font-size: 14px;
-            padding: 2px;
-        """)
+        self.score_display.setObjectName("scoreDisplay")
         info_layout.addWidget(self.score_display)
         
         # Score buttons layout
@@ -209,25 +650,7 @@ class ThumbnailWidget(QWidget):
             btn = QPushButton(f"{i}★")
             btn.setMaximumWidth(35)
             btn.setCheckable(True)
-            btn.setStyleSheet("""
-                QPushButton { 
-                    padding: 4px;
-                    background-color: #3d3d3d;
-                    color: #b0b0b0;
-                    border: none;
-                    border-radius: 3px;
-                    font-size: 13px;
-                }
-                QPushButton:hover { 
-                    background-color: #4d4d4d;
-                    color: #ffd700;
-                }
-                QPushButton:checked {
-                    background-color: #ffd700;
-                    color: black;
-                    font-weight: bold;
-                }
-            """)
+            btn.setObjectName("score")
             btn.clicked.connect(lambda checked, score=i: self.set_score(score))
             score_layout.addWidget(btn)
             self.score_buttons.append(btn)
@@ -235,9 +658,23 @@ class ThumbnailWidget(QWidget):
         info_layout.addLayout(score_layout)
         layout.addWidget(info_container)
     
+    def reset(self, index):
+        # Reuse this widget for another file without emitting score_changed
+        self.index = index
+        self.score = 0
+        self.update_score_display()
+        for btn in self.score_buttons:
+            btn.setChecked(False)
+        self.set_info("", "")
+        self._pixmap_key = None
+    
     def set_score(self, score):
-        self.score = score
+        self.show_score(score)
         self.score_changed.emit(self.index, score)
+    
+    def show_score(self, score):
+        # Display a score that is already recorded, without score_changed
+        self.score = score
         self.update_score_display()
         
         # Update button states
@@ -249,27 +686,25 @@ class ThumbnailWidget(QWidget):
         self.score_display.setText(f"Score: {self.score}★")
         
         # Update score indicator on image
-        if hasattr(self, 'score_label'):
+        if self.score_label is not None:
             self.score_label.deleteLater()
+            self.score_label = None
             
         if self.score > 0:
             self.score_label = QLabel(f"{self.score}★", self.image_label)
-            self.score_label.setStyleSheet("""
-                background-color: #ffd700;
-                color: black;
-                padding: 4px 8px;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 14px;
-            """)
+            self.score_label.setObjectName("scoreBadge")
             self.score_label.move(8, 8)
     
     def setPixmap(self, pixmap):
-        if pixmap:
-            scaled_pixmap = pixmap.scaled(QSize(280, 280), 
-                                        Qt.AspectRatioMode.KeepAspectRatio,
-                                        Qt.TransformationMode.SmoothTransformation)
-            self.image_label.setPixmap(scaled_pixmap)
+        if not pixmap or pixmap.cacheKey() == self._pixmap_key:
+            return
+        self._pixmap_key = pixmap.cacheKey()
+        # Loader thumbnails are already cell-sized; only scale anything larger
+        if pixmap.width() > THUMBNAIL_SIZE or pixmap.height() > THUMBNAIL_SIZE:
+            pixmap = pixmap.scaled(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                                   Qt.AspectRatioMode.KeepAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        self.image_label.setPixmap(pixmap)
     
     def set_info(self, filename, datetime_str):
         self.filename_label.setText(filename)
@@ -282,6 +717,7 @@ class ThumbnailWidget(QWidget):
 class GridWidget(QWidget):
     thumbnail_clicked = pyqtSignal(int)
     thumbnail_scored = pyqtSignal(int, int)
+    thumbnails_visible = pyqtSignal(list)  # indices on screen still showing the placeholder
     
     def __init__(self):
         super().__init__()
@@ -290,7 +726,7 @@ class GridWidget(QWidget):
         self.container.setStyleSheet("background-color: #1a1a1a;")
         
         # Create scroll area
-        scroll_area = QScrollArea()
+        self.scroll_area = scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_area.setWidget(self.container)
         scroll_area.setStyleSheet("""
@@ -312,6 +748,8 @@ class GridWidget(QWidget):
             }
         """)
         
+        scroll_area.verticalScrollBar().valueChanged.connect(self._request_visible)
+        
         # Main layout for this widget
         main_layout = QVBoxLayout(self)
         main_layout.addWidget(scroll_area)
@@ -324,62 +762,101 @@ class GridWidget(QWidget):
         self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         
         self.thumbnails = {}
-        self.placeholder_pixmap = QPixmap(280, 280)
+        self._pool = []  # hidden ThumbnailWidgets kept for reuse
+        self._loaded = set()
+        self._columns = 0
+        self._relayout_pending = False
+        self.placeholder_pixmap = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
         self.placeholder_pixmap.fill(Qt.GlobalColor.black)
     
     def clear(self):
+        # Hide rather than delete; rebuilding the widgets is the slow part
         for thumb in self.thumbnails.values():
             self.layout.removeWidget(thumb)
-            thumb.deleteLater()
+            thumb.setVisible(False)
+            self._pool.append(thumb)
         self.thumbnails.clear()
+        self._loaded.clear()
+    
+    def _column_count(self):
+        return max(2, self.width() // 340)  # Dynamically calculate number of columns
     
     def prepare_thumbnails(self, count):
         self.clear()
-        columns = max(2, self.width() // 340)  # Dynamically calculate number of columns
+        columns = self._columns = self._column_count()
         
         for i in range(count):
             row = i // columns
             col = i % columns
             
-            thumb = ThumbnailWidget(i)
+            if self._pool:
+                thumb = self._pool.pop()
+                thumb.reset(i)
+            else:
+                thumb = ThumbnailWidget(i)
+                thumb.clicked.connect(self.thumbnail_clicked.emit)
+                thumb.score_changed.connect(self.thumbnail_scored.emit)
             thumb.setPixmap(self.placeholder_pixmap)
-            thumb.clicked.connect(self.thumbnail_clicked.emit)
-            thumb.score_changed.connect(self.thumbnail_scored.emit)
             self.layout.addWidget(thumb, row, col)
+            thumb.setVisible(True)
             self.thumbnails[i] = thumb
+        
+        # Wait for the layout to place the new widgets before measuring
+        QTimer.singleShot(0, self._request_visible)
+    
+    def _request_visible(self):
+        if not self.thumbnails or not self.isVisible():
+            return
+        self.layout.activate()
+        
+        # Viewport in container coordinates, padded by half a screen so
+        # the next rows are already loading when they scroll in
+        viewport = self.scroll_area.viewport()
+        top = self.scroll_area.verticalScrollBar().value()
+        margin = viewport.height() // 2
+        visible_rect = QRect(0, top - margin, viewport.width(), viewport.height() + 2 * margin)
+        
+        visible = [index for index, thumb in self.thumbnails.items()
+                   if thumb.geometry().intersects(visible_rect)]
+        self.thumbnails_visible.emit([i for i in visible if i not in self._loaded])
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self._request_visible)
     
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        if self.thumbnails:
-            # Recalculate grid layout when window is resized
-            items = [(index, thumb) for index, thumb in self.thumbnails.items()]
-            columns = max(2, self.width() // 340)
-            
-            for index, thumb in items:
-                self.layout.removeWidget(thumb)
-                row = index // columns
-                col = index % columns
-                self.layout.addWidget(thumb, row, col)
+        # Coalesce the burst of resize events from a window drag
+        if self.thumbnails and not self._relayout_pending:
+            self._relayout_pending = True
+            QTimer.singleShot(50, self._relayout)
+    
+    def _relayout(self):
+        self._relayout_pending = False
+        columns = self._column_count()
+        if columns == self._columns:
+            # Same columns, but a taller window may expose more rows
+            self._request_visible()
+            return
+        self._columns = columns
+        
+        # Recalculate grid layout when the column count changes
+        for index, thumb in self.thumbnails.items():
+            self.layout.removeWidget(thumb)
+            row = index // columns
+            col = index % columns
+            self.layout.addWidget(thumb, row, col)
+        self._request_visible()
     
     def update_thumbnail(self, index, pixmap, score=0, orientation=0, filename="", datetime_str=""):
         if index in self.thumbnails:
             thumb = self.thumbnails[index]
             
-            # Apply rotation based on orientation
-            if orientation == 90:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(90))
-            elif orientation == 270:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(270))
-            elif orientation == 180:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(180))
-            
+            # Thumbnails arrive already rotated by ThumbnailLoader
             thumb.setPixmap(pixmap)
+            self._loaded.add(index)
             thumb.set_info(filename, datetime_str)
-            if score > 0:
-                thumb.set_score(score)
+            thumb.show_score(score)
 
 class SingleImageWidget(QWidget):
     def __init__(self):
@@ -393,16 +870,7 @@ class SingleImageWidget(QWidget):
     def set_image(self, pixmap, orientation=0):
         if pixmap:
             self.current_orientation = orientation
-            # Apply rotation based on orientation
-            if orientation == 90:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(90))
-            elif orientation == 270:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(270))
-            elif orientation == 180:
-                transform = QTransform()
-                pixmap = pixmap.transformed(transform.rotate(180))
+            pixmap = apply_orientation(pixmap, orientation)
             
             scaled_pixmap = pixmap.scaled(self.size(), 
                                         Qt.AspectRatioMode.KeepAspectRatio,
@@ -418,6 +886,7 @@ class SingleImageWidget(QWidget):
             self.set_image(self.image_label.pixmap().copy(), self.current_orientation)
 
 class RAFImporter(QMainWindow):
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("RAF Photo Importer")
@@ -428,13 +897,29 @@ class RAFImporter(QMainWindow):
         self.raf_files = []
         self.current_index = 0
         self.scores = {}
+        self._all_files = []  # every RAF in current_folder, sorted
+        self._mtimes = {}  # str(path) -> st_mtime from the folder scan
+        self._files_by_score = {}  # score -> sorted files in current_folder
         self.is_grid_view = True
         
+        # Thumbnails and scores persisted between runs
+        self.store = ThumbnailStore(default_store_path())
+        
         # Initialize thumbnail loader
-        self.thumbnail_loader = ThumbnailLoader()
+        self.thumbnail_loader = ThumbnailLoader(self.store)
         self.thumbnail_loader.thumbnail_ready.connect(self._on_thumbnail_ready)
         self.thumbnail_loader.progress_updated.connect(self._update_progress)
         self.thumbnail_loader.batch_complete.connect(self._on_loading_complete)
+        self.thumbnail_loader.full_image_ready.connect(self._on_full_image_ready)
+        self.thumbnail_loader.full_image_failed.connect(self._on_full_image_failed)
+        
+        # Exports are dispatched by an ExportWorker on its own QThread. As
+        # with the decode pool, spawned workers re-import this script
+        self._export_executor = self._new_export_executor()
+        self._export_folder = None
+        self._export_thread = None
+        self._export_worker = None
+        self._prefetch = {}  # file_path -> Future for neighbour previews
         
         self.init_ui()
     
@@ -468,6 +953,25 @@ class RAFImporter(QMainWindow):
         self.export_btn.clicked.connect(self.export_selected)
         toolbar.addWidget(self.export_btn)
         
+        # Half-size exports skip demosaicing: quick web-sized JPEGs
+        self.half_size_check = QCheckBox("Half size (fast)")
+        toolbar.addWidget(self.half_size_check)
+        
+        # Copy the camera's embedded JPEG instead of developing the RAF
+        self.embedded_check = QCheckBox("Embedded JPEG (fast)")
+        toolbar.addWidget(self.embedded_check)
+        
+        # Leave colour conversion to viewers through an embedded ICC profile
+        self.camera_color_check = QCheckBox("Camera colour + ICC")
+        toolbar.addWidget(self.camera_color_check)
+        
+        # JPEG quality used for exports
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(50, 100)
+        self.quality_spin.setValue(JPEG_QUALITY)
+        self.quality_spin.setPrefix("Quality ")
+        toolbar.addWidget(self.quality_spin)
+        
         self.main_layout.addLayout(toolbar)
         
         # Add progress bar
@@ -483,6 +987,7 @@ class RAFImporter(QMainWindow):
         self.grid_widget = GridWidget()
         self.grid_widget.thumbnail_clicked.connect(self.on_thumbnail_clicked)
         self.grid_widget.thumbnail_scored.connect(self.on_thumbnail_scored)
+        self.grid_widget.thumbnails_visible.connect(self._on_thumbnails_visible)
         
         # Create single image view
         self.single_image_widget = SingleImageWidget()
@@ -514,35 +1019,42 @@ class RAFImporter(QMainWindow):
         # Add status bar for file info
         self.statusBar().showMessage("No folder selected")
         
+        # Thumbnail cache diagnostics, kept out of the way of status messages
+        self.cache_label = QLabel()
+        self.cache_label.setStyleSheet("color: #808080;")
+        self.statusBar().addPermanentWidget(self.cache_label)
+        
         # Enable focus for keyboard events
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
     
     def _on_thumbnail_ready(self, index, pixmap, file_path, orientation):
         try:
             # Get file info
+            datetime_str = format_timestamp(self._mtimes.get(file_path))
             file_path = Path(file_path)
             filename = file_path.name
             
-            # Get creation date from RAF file
-            with rawpy.imread(str(file_path)) as raw:
-                try:
-                    # Try to get the date from metadata
-                    timestamp = os.path.getmtime(file_path)
-                    datetime_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
-                except:
-                    datetime_str = "Date unknown"
-            
             score = self.scores.get(str(file_path), 0)
             self.grid_widget.update_thumbnail(index, pixmap, score, orientation, filename, datetime_str)
         except Exception as e:
             print(f"Error updating thumbnail: {str(e)}")
     
+    def _on_thumbnails_visible(self, indices):
+        self.thumbnail_loader.cancel_pending(keep=set(indices))
+        self.thumbnail_loader.request(indices)
+    
     def _update_progress(self, value):
-        self.progress_bar.setValue(value)
+        # The bar belongs to a running export until it finishes
+        if self._export_worker is None:
+            self.progress_bar.setValue(value)
     
     def _on_loading_complete(self):
-        self.progress_bar.setVisible(False)
+        if self._export_worker is None:
+            self.progress_bar.setVisible(False)
         self.folder_btn.setEnabled(True)
+        
+        entries, hits, misses = self.thumbnail_loader.cache_stats()
+        self.cache_label.setText(f"Cache: {entries} thumbs, {hits} hits / {misses} misses")
     
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_Space:
@@ -584,13 +1096,17 @@ class RAFImporter(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")
         if folder:
             self.current_folder = Path(folder)
-            self.raf_files = sorted([f for f in self.current_folder.glob("*.RAF")])
+            self._all_files, self._mtimes = scan_raf_files(self.current_folder)
+            self.scores.update(self.store.load_scores(self._mtimes))
+            self._index_scores()
+            self.raf_files = list(self._all_files)
             
             if self.raf_files:
                 self.current_index = 0
                 self.folder_btn.setEnabled(False)
-                self.progress_bar.setVisible(True)
-                self.progress_bar.setValue(0)
+                if self._export_worker is None:
+                    self.progress_bar.setVisible(True)
+                    self.progress_bar.setValue(0)
                 
                 if self.is_grid_view:
                     self.load_grid_view()
@@ -605,79 +1121,85 @@ class RAFImporter(QMainWindow):
             return
         
         current_file = self.raf_files[self.current_index]
-        try:
-            with rawpy.imread(str(current_file)) as raw:
-                # Get orientation from metadata or image dimensions
-                orientation = 0
-                try:
-                    if hasattr(raw, 'metadata') and hasattr(raw.metadata, 'orientation'):
-                        orientation = raw.metadata.orientation
-                    else:
-                        # Fallback to checking raw sizes
-                        raw_height = raw.sizes.raw_height
-                        raw_width = raw.sizes.raw_width
-                        if raw_height > raw_width:  # Portrait image
-                            orientation = 90
-                except:
-                    pass
-                
-                thumb = raw.extract_thumb()
-                if thumb.format == rawpy.ThumbFormat.JPEG:
-                    image_data = thumb.data
-                    qimage = QImage.fromData(image_data)
-                    
-                    # If no orientation from metadata, check image dimensions
-                    if orientation == 0 and qimage.height() > qimage.width():
-                        orientation = 90
-                    
-                    # Apply rotation based on orientation
-                    if orientation == 90 or orientation == 5:
-                        transform = QTransform()
-                        qimage = qimage.transformed(transform.rotate(90))
-                    elif orientation == 270 or orientation == 7:
-                        transform = QTransform()
-                        qimage = qimage.transformed(transform.rotate(270))
-                    elif orientation == 180 or orientation == 3:
-                        transform = QTransform()
-                        qimage = qimage.transformed(transform.rotate(180))
-                    
-                    pixmap = QPixmap.fromImage(qimage)
-                    self.single_image_widget.set_image(pixmap)
-                    
-            score = self.scores.get(str(current_file), 0)
-            self.statusBar().showMessage(f"{current_file.name} - Score: {score}★")
-        except Exception as e:
-            self.statusBar().showMessage(f"Error loading image: {str(e)}")
+        file_path = str(current_file)
+        score = self.scores.get(file_path, 0)
+        self.statusBar().showMessage(f"{current_file.name} - Score: {score}★")
+        
+        pixmap = self.thumbnail_loader.get_full(file_path)
+        if pixmap is not None:
+            self.single_image_widget.set_image(pixmap)
+            return
+        
+        # Show the already-decoded grid thumbnail until the full preview arrives
+        cached_data = self.thumbnail_loader.get_thumbnail(file_path)
+        if cached_data:
+            self.single_image_widget.set_image(cached_data[0])
+        self.thumbnail_loader.request_full(file_path)
+    
+    def _is_current_file(self, file_path):
+        return bool(self.raf_files) and file_path == str(self.raf_files[self.current_index])
+    
+    def _on_full_image_ready(self, file_path, qimage, orientation):
+        pixmap = QPixmap.fromImage(qimage)
+        self.thumbnail_loader.store_full(file_path, pixmap)
+        # Ignore images the user has already navigated away from
+        if not self.is_grid_view and self._is_current_file(file_path):
+            self.single_image_widget.set_image(pixmap)
+    
+    def _on_full_image_failed(self, file_path, error):
+        if self._is_current_file(file_path):
+            self.statusBar().showMessage(f"Error loading image: {error}")
     
     def show_next(self):
         if self.raf_files and self.current_index < len(self.raf_files) - 1:
             self.current_index += 1
             if not self.is_grid_view:
                 self.show_current_image()
+                self._prefetch_neighbors(1)
     
     def show_previous(self):
         if self.raf_files and self.current_index > 0:
             self.current_index -= 1
             if not self.is_grid_view:
                 self.show_current_image()
+                self._prefetch_neighbors(-1)
+    
+    def _prefetch_neighbors(self, step):
+        # Decode the next images in the direction of travel so the following
+        # keypress hits the full-image cache
+        targets = set()
+        for distance in range(1, PREFETCH_DEPTH + 1):
+            index = self.current_index + step * distance
+            if 0 <= index < len(self.raf_files):
+                file_path = str(self.raf_files[index])
+                if self.thumbnail_loader.get_full(file_path) is None:
+                    targets.add(file_path)
+        
+        # Drop queued prefetches left over from the other direction, but
+        # never the one the current image is waiting on
+        current = str(self.raf_files[self.current_index])
+        for file_path, future in self._prefetch.items():
+            if file_path not in targets and file_path != current:
+                future.cancel()
+        
+        self._prefetch = {file_path: self.thumbnail_loader.request_full(file_path)
+                          for file_path in targets}
     
     def set_score(self, score):
         if not self.raf_files:
             return
         current_file = str(self.raf_files[self.current_index])
         print(f"Setting score {score} for {current_file}")  # Debug info
-        self.scores[current_file] = score
+        self._record_score(current_file, score)
         self.statusBar().showMessage(f"{Path(current_file).name} - Score: {score}★")
         
         # Always update the grid view thumbnail, regardless of current view mode
         try:
-            cached_data = self.thumbnail_loader._cache.get(current_file)
+            cached_data = self.thumbnail_loader.get_thumbnail(current_file)
             if cached_data:
                 pixmap, orientation = cached_data
                 filename = Path(current_file).name
-                # Get the timestamp
-                timestamp = os.path.getmtime(current_file)
-                datetime_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+                datetime_str = format_timestamp(self._mtimes.get(current_file))
                 # Update the thumbnail in grid view
                 self.grid_widget.update_thumbnail(
                     self.current_index,
@@ -690,18 +1212,40 @@ class RAFImporter(QMainWindow):
         except Exception as e:
             print(f"Error updating thumbnail score: {str(e)}")
     
+    def _index_scores(self):
+        # _all_files is sorted, so each bucket starts out sorted too
+        self._files_by_score = {score: [] for score in range(6)}
+        for f in self._all_files:
+            self._files_by_score[self.scores.get(str(f), 0)].append(f)
+    
+    def _record_score(self, file_path, score):
+        old_score = self.scores.get(file_path, 0)
+        self.scores[file_path] = score
+        if old_score == score:
+            return
+        self.store.set_score(file_path, score)
+        
+        # Move the file between score buckets, keeping both sorted
+        path = Path(file_path)
+        old_files = self._files_by_score.get(old_score, [])
+        i = bisect_left(old_files, path)
+        if i < len(old_files) and old_files[i] == path:
+            del old_files[i]
+            insort(self._files_by_score[score], path)
+    
     def filter_images(self, filter_text):
         if not self.current_folder:
             return
             
         if filter_text == "All":
-            self.raf_files = sorted([f for f in self.current_folder.glob("*.RAF")])
+            files = self._all_files
         else:
-            score = int(filter_text[0])
-            self.raf_files = sorted([
-                Path(f) for f, s in self.scores.items()
-                if s == score and Path(f).suffix.upper() == ".RAF"
-            ])
+            files = self._files_by_score.get(int(filter_text[0]), [])
+        
+        # Same images as already shown; keep the grid as it is
+        if files and files == self.raf_files:
+            return
+        self.raf_files = list(files)
         
         if self.raf_files:
             self.current_index = 0
@@ -745,93 +1289,71 @@ class RAFImporter(QMainWindow):
             return
             
         export_path = Path(export_folder)
-        exported = 0
+        self._export_folder = export_folder
         
         # Show progress dialog
+        self.export_btn.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.statusBar().showMessage(f"Exporting {len(files_to_export)} images...")
-        QApplication.processEvents()  # Ensure UI updates
         
         # Export files
-        for i, (raf_file, score) in enumerate(files_to_export):
-            try:
-                self.statusBar().showMessage(f"Processing {raf_file.name}...")
-                QApplication.processEvents()  # Ensure UI updates
-                
-                with rawpy.imread(str(raf_file)) as raw:
-                    # Get orientation from metadata or image dimensions
-                    orientation = 0
-                    try:
-                        if hasattr(raw, 'metadata') and hasattr(raw.metadata, 'orientation'):
-                            orientation = raw.metadata.orientation
-                        else:
-                            # Fallback to checking raw sizes
-                            raw_height = raw.sizes.raw_height
-                            raw_width = raw.sizes.raw_width
-                            if raw_height > raw_width:  # Portrait image
-                                orientation = 90
-                    except:
-                        pass
-                    
-                    # Process RAW with optimal settings for Fujifilm
-                    rgb = raw.postprocess(
-                        use_camera_wb=True,    # Use camera white balance
-                        use_auto_wb=False,     # Don't use auto white balance
-                        bright=1.2,            # Slightly increase brightness
-                        no_auto_bright=True,   # Disable auto brightness to keep exposure control
-                        output_bps=8,          # Use 8-bit output for JPEG compatibility
-                        gamma=(2.222, 4.5),    # Standard gamma curve for Fujifilm
-                        user_flip=0,           # We'll handle rotation separately
-                        demosaic_algorithm=rawpy.DemosaicAlgorithm.AHD,  # High quality demosaicing
-                        output_color=rawpy.ColorSpace.sRGB,  # Use sRGB color space
-                        highlight_mode=rawpy.HighlightMode.Blend,  # Better highlight handling
-                        fbdd_noise_reduction=rawpy.FBDDNoiseReductionMode.Full  # Better noise reduction
-                    )
-                    
-                    # Convert to PIL Image
-                    image = Image.fromarray(rgb)
-                    
-                    # Apply rotation based on orientation
-                    if orientation == 90 or orientation == 5:
-                        image = image.transpose(Image.Transpose.ROTATE_90)
-                    elif orientation == 270 or orientation == 7:
-                        image = image.transpose(Image.Transpose.ROTATE_270)
-                    elif orientation == 180 or orientation == 3:
-                        image = image.transpose(Image.Transpose.ROTATE_180)
-                    
-                    # Save as high-quality JPEG
-                    output_file = export_path / f"{raf_file.stem}.jpg"
-                    self.statusBar().showMessage(f"Saving {output_file.name}...")
-                    QApplication.processEvents()  # Ensure UI updates
-                    
-                    image.save(output_file, "JPEG", quality=95, optimize=True)
-                    exported += 1
-                    
-                    # Update progress
-                    progress = int((i + 1) * 100 / len(files_to_export))
-                    self.progress_bar.setValue(progress)
-                    self.statusBar().showMessage(f"Exported {exported}/{len(files_to_export)} images...")
-                    QApplication.processEvents()  # Ensure UI updates
-                    
-            except Exception as e:
-                print(f"Error exporting {raf_file}: {str(e)}")
-                self.statusBar().showMessage(f"Error exporting {raf_file.name}: {str(e)}")
-                QApplication.processEvents()  # Ensure UI updates
+        files = [raf_file for raf_file, score in files_to_export]
+        options = {'half_size': self.half_size_check.isChecked(),
+                   'quality': self.quality_spin.value(),
+                   'embedded': self.embedded_check.isChecked(),
+                   'camera_color': self.camera_color_check.isChecked()}
+        self._export_worker = ExportWorker(self._export_executor, files, export_path, options)
+        self._export_thread = QThread(self)
+        self._export_worker.moveToThread(self._export_thread)
+        self._export_thread.started.connect(self._export_worker.run)
+        self._export_worker.progress.connect(self._on_export_progress)
+        self._export_worker.finished.connect(self._on_export_finished)
+        self._export_thread.start()
+    
+    def _on_export_progress(self, progress, message):
+        self.progress_bar.setValue(progress)
+        self.statusBar().showMessage(message)
+    
+    def _new_export_executor(self):
+        return ProcessPoolExecutor(max_workers=EXPORT_WORKERS,
+                                   mp_context=multiprocessing.get_context("spawn"))
+    
+    def _on_export_finished(self, exported):
+        broken = self._export_worker.pool_broken
+        self._stop_export()
+        if broken:
+            # A broken pool refuses all further work; start a fresh one
+            self._export_executor.shutdown(wait=False)
+            self._export_executor = self._new_export_executor()
         
         # Hide progress bar and show final status
         self.progress_bar.setVisible(False)
-        self.statusBar().showMessage(f"Successfully exported {exported} images to {export_folder}")
-        QApplication.processEvents()  # Ensure UI updates
+        self.export_btn.setEnabled(True)
+        self.statusBar().showMessage(f"Successfully exported {exported} images to {self._export_folder}")
+    
+    def _stop_export(self):
+        if self._export_worker is None:
+            return
+        self._export_worker.stop()
+        self._export_thread.quit()
+        self._export_thread.wait()
+        self._export_worker.deleteLater()
+        self._export_thread.deleteLater()
+        self._export_worker = None
+        self._export_thread = None
     
     def closeEvent(self, event):
         self.thumbnail_loader.stop()
+        self._stop_export()
+        self._export_executor.shutdown(wait=False)
+        self.store.commit()
         super().closeEvent(event)
     
     def on_thumbnail_scored(self, index, score):
         if 0 <= index < len(self.raf_files):
             file_path = str(self.raf_files[index])
-            self.scores[file_path] = score
+            self._record_score(file_path, score)
             self.statusBar().showMessage(f"{Path(file_path).name} - Score: {score}★")
             
             # If we're in single view mode and this is the current image,
@@ -844,6 +1366,7 @@ def main():
     
     # Set application-wide style
     app.setStyle('Fusion')
+    app.setStyleSheet(APP_STYLESHEET)
     
     # Set the app icon
     app.setWindowIcon(create_app_icon())
@@ -0,0 +1,42 @@
+import io
+
+from PIL import Image
+
+# Qt's rotate() turns clockwise, PIL's ROTATE_* counter-clockwise
+_CLOCKWISE_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+def decode_thumbnail(data, decode_size, size, angle, encode_png=False):
+    """Decode an embedded JPEG preview into a small, rotated RGB buffer.
+
+    Runs in a worker process. It needs only Pillow and returns plain,
+    picklable values: (width, height, rgb_bytes, angle, png_bytes), where
+    png_bytes is None unless encode_png is set. The caller passes the
+    angle from the preview's EXIF; when it is None the preview's shape
+    decides, so portrait previews turn 90 degrees.
+    """
+    image = Image.open(io.BytesIO(data))
+    
+    # draft() lets libjpeg(-turbo) scale down during the IDCT instead of
+    # decoding the full-resolution preview first
+    image.draft('RGB', (decode_size, decode_size))
+    image = image.convert('RGB')
+    
+    if angle is None:
+        angle = 90 if image.height > image.width else 0
+    
+    # Scale before rotating so the rotation only touches thumbnail-sized pixels
+    image.thumbnail((size, size))
+    if angle in _CLOCKWISE_TRANSPOSES:
+        image = image.transpose(_CLOCKWISE_TRANSPOSES[angle])
+    
+    png = None
+    if encode_png:
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        png = buffer.getvalue()
+    
+    return image.width, image.height, image.tobytes('raw', 'RGB'), angle, png
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Seconds to wait for another process's write lock before giving up
+STORE_BUSY_TIMEOUT = 0.5
+
+def default_store_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "raf-ingester" / "thumbs.db"
+
+class ThumbnailStore:
+    """Sidecar SQLite cache of grid thumbnails and scores, keyed by RAF path.
+
+    Thumbnails are only returned while the file's mtime and size still
+    match. Thumbnail writes accumulate in one transaction until commit(),
+    so a folder load costs a single fsync rather than one per thumbnail;
+    ratings commit as they are made. Database errors are logged and the
+    app carries on without the store.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Shared by the loader's pool threads; every use holds _lock.
+            # Give up quickly when another process holds the write lock,
+            # since ratings are written from the GUI thread
+            self._conn = sqlite3.connect(str(db_path), timeout=STORE_BUSY_TIMEOUT,
+                                         check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS t("
+                "path TEXT PRIMARY KEY, mtime REAL, size INT, orient INT, png BLOB, score INT)")
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Thumbnail store disabled: {str(e)}")
+            self._conn = None
+
+    def get_thumbnail(self, path, mtime, size):
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT mtime, size, orient, png FROM t WHERE path=?", (path,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading thumbnail store: {str(e)}")
+            return None
+        if row is None or row[3] is None or row[0] != mtime or row[1] != size:
+            return None
+        return row[2], row[3]
+
+    def put_thumbnail(self, path, mtime, size, orientation, png):
+        if self._conn is None:
+            return
+        # Upsert so a score stored before the thumbnail survives
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO t(path, mtime, size, orient, png) VALUES(?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET mtime=excluded.mtime, size=excluded.size, "
+                    "orient=excluded.orient, png=excluded.png",
+                    (path, mtime, size, orientation, png))
+        except sqlite3.Error as e:
+            print(f"Error storing thumbnail: {str(e)}")
+
+    def load_scores(self, paths):
+        if self._conn is None:
+            return {}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path, score FROM t WHERE score IS NOT NULL").fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading scores: {str(e)}")
+            return {}
+        paths = set(paths)
+        return {path: score for path, score in rows if path in paths}
+
+    def set_score(self, path, score):
+        # Committed straight away: a rating is worth an fsync, and an open
+        # write transaction would lock other processes out of the store
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO t(path, score) VALUES(?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET score=excluded.score",
+                    (path, score))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error storing score: {str(e)}")
+
+    def commit(self):
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error committing thumbnail store: {str(e)}")
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.commit()
+                self._conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing thumbnail store: {str(e)}")
+        self._conn = None
@@ -0,0 +1,28 @@
+"""Render the app icon once and store it as PNGs next to app_icon.py.
+
+Run after changing the drawing code in app_icon.py:
+
+    python tools/bake_icon.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtGui import QGuiApplication
+
+import app_icon
+
+def main():
+    app = QGuiApplication(sys.argv)
+    app_icon.RESOURCE_DIR.mkdir(exist_ok=True)
+    for size in app_icon.ICON_SIZES:
+        path = app_icon.baked_icon_path(size)
+        if not app_icon._render(size).save(str(path), "PNG"):
+            print(f"Failed to write {path}")
+            return 1
+        print(f"Wrote {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())